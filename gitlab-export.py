@@ -1,349 +1,1302 @@
-#!/usr/bin/env python3
-"""
-Export GitLab projects, archived projects (separately), groups, and users to CSV.
-
-Outputs (by default) in ./gitlab_export_<timestamp>/ :
-- projects.csv            : active projects, members (username:role)
-- archived_projects.csv   : archived projects, members (username:role)  [only if --include-archived]
-- groups.csv              : groups, members (username:role)
-- users.csv               : users with status and flags (admin/external/bot/etc)
-
-Auth notes (self-managed):
-- Exporting ALL users typically requires an admin token (or equivalent permission).
-- Group/project member listings depend on token visibility.
-"""
-
-from __future__ import annotations
-
-import argparse
-import csv
-import os
-import sys
-import time
-from datetime import datetime, timezone
-from pathlib import Path
-from typing import List, Optional
-
-import gitlab
-
-
-ACCESS_LEVELS = {
-    10: "Guest",
-    20: "Reporter",
-    30: "Developer",
-    40: "Maintainer",
-    50: "Owner",
-}
-
-
-def utc_stamp() -> str:
-    return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_UTC")
-
-
-def eprint(*args, **kwargs):
-    print(*args, file=sys.stderr, **kwargs)
-
-
-def access_level_name(level: Optional[int]) -> str:
-    if level is None:
-        return ""
-    return ACCESS_LEVELS.get(level, str(level))
-
-
-def safe_get(obj, attr: str, default=None):
-    return getattr(obj, attr, default)
-
-
-def make_gitlab_client(url: str, token: str, ssl_verify: bool) -> gitlab.Gitlab:
-    gl = gitlab.Gitlab(url=url, private_token=token, ssl_verify=ssl_verify)
-    gl.auth()  # validate token
-    return gl
-
-
-def iter_all(items_list_callable, **kwargs):
-    """
-    Iterate all pages via python-gitlab using iterator=True.
-    """
-    return items_list_callable(iterator=True, **kwargs)
-
-
-def format_members(members_iter) -> str:
-    """
-    Return semicolon-separated unique member strings: ident:Role
-    """
-    members_parts: List[str] = []
-    for m in members_iter:
-        username = safe_get(m, "username", "") or ""
-        name = safe_get(m, "name", "") or ""
-        access_level = safe_get(m, "access_level", None)
-        role = access_level_name(access_level)
-
-        ident = username if username else name
-        if not ident:
-            ident = f"user_id_{safe_get(m, 'id', '')}"
-
-        members_parts.append(f"{ident}:{role}")
-
-    return ";".join(sorted(set(members_parts)))
-
-
-def export_projects(
-    gl: gitlab.Gitlab,
-    out_csv: Path,
-    archived: bool,
-    members_scope: str,
-    sleep_s: float,
-):
-    """
-    Export projects + members + roles.
-    archived: if True, export only archived projects; if False export only non-archived.
-    members_scope:
-      - "all"    : includes inherited members (group/ancestor)
-      - "direct" : direct project members only
-    """
-    label = "archived projects" if archived else "active projects"
-    eprint(f"Exporting {label} -> {out_csv.name} ...")
-
-    with out_csv.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "project_id",
-                "project_name",
-                "project_path_with_namespace",
-                "http_url_to_repo",
-                "default_branch",
-                "visibility",
-                "archived",
-                "members",  # semicolon separated: username:Role
-            ],
-        )
-        writer.writeheader()
-
-        projects = iter_all(gl.projects.list, archived=archived)
-
-        count = 0
-        for p in projects:
-            count += 1
-            proj = gl.projects.get(p.id)
-
-            if members_scope == "all":
-                members_iter = iter_all(proj.members_all.list)
-            else:
-                members_iter = iter_all(proj.members.list)
-
-            writer.writerow(
-                {
-                    "project_id": proj.id,
-                    "project_name": safe_get(proj, "name", ""),
-                    "project_path_with_namespace": safe_get(proj, "path_with_namespace", ""),
-                    "http_url_to_repo": safe_get(proj, "http_url_to_repo", ""),
-                    "default_branch": safe_get(proj, "default_branch", ""),
-                    "visibility": safe_get(proj, "visibility", ""),
-                    "archived": bool(safe_get(proj, "archived", False)),
-                    "members": format_members(members_iter),
-                }
-            )
-
-            if sleep_s > 0:
-                time.sleep(sleep_s)
-
-            if count % 50 == 0:
-                eprint(f"  ...{count} projects processed")
-
-    eprint(f"Projects export complete: {out_csv}")
-
-
-def export_groups(
-    gl: gitlab.Gitlab,
-    out_csv: Path,
-    members_scope: str,
-    sleep_s: float,
-):
-    """
-    Export groups + members + roles.
-    members_scope:
-      - "all"    : includes inherited members (from parent groups)
-      - "direct" : direct group members only
-    """
-    eprint(f"Exporting groups -> {out_csv.name} ...")
-
-    with out_csv.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "group_id",
-                "group_name",
-                "group_full_path",
-                "web_url",
-                "visibility",
-                "parent_id",
-                "members",  # semicolon separated: username:Role
-            ],
-        )
-        writer.writeheader()
-
-        groups = iter_all(gl.groups.list)
-
-        count = 0
-        for g in groups:
-            count += 1
-            grp = gl.groups.get(g.id)
-
-            if members_scope == "all":
-                members_iter = iter_all(grp.members_all.list)
-            else:
-                members_iter = iter_all(grp.members.list)
-
-            writer.writerow(
-                {
-                    "group_id": grp.id,
-                    "group_name": safe_get(grp, "name", ""),
-                    "group_full_path": safe_get(grp, "full_path", ""),
-                    "web_url": safe_get(grp, "web_url", ""),
-                    "visibility": safe_get(grp, "visibility", ""),
-                    "parent_id": safe_get(grp, "parent_id", ""),
-                    "members": format_members(members_iter),
-                }
-            )
-
-            if sleep_s > 0:
-                time.sleep(sleep_s)
-
-            if count % 100 == 0:
-                eprint(f"  ...{count} groups processed")
-
-    eprint(f"Groups export complete: {out_csv}")
-
-
-def export_users(
-    gl: gitlab.Gitlab,
-    out_csv: Path,
-    sleep_s: float,
-):
-    """
-    Export users + status + flags.
-    Listing all users typically requires admin rights on self-managed GitLab.
-    """
-    eprint(f"Exporting users -> {out_csv.name} ...")
-
-    with out_csv.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "user_id",
-                "username",
-                "name",
-                "state",          # active / blocked / etc
-                "is_admin",
-                "external",
-                "bot",
-                "email",
-                "created_at",
-                "last_sign_in_at",
-            ],
-        )
-        writer.writeheader()
-
-        users = iter_all(gl.users.list)
-
-        count = 0
-        for u in users:
-            count += 1
-            user = gl.users.get(u.id)
-
-            writer.writerow(
-                {
-                    "user_id": user.id,
-                    "username": safe_get(user, "username", ""),
-                    "name": safe_get(user, "name", ""),
-                    "state": safe_get(user, "state", ""),
-                    "is_admin": bool(safe_get(user, "is_admin", False)),
-                    "external": bool(safe_get(user, "external", False)),
-                    "bot": bool(safe_get(user, "bot", False)),
-                    "email": safe_get(user, "email", ""),
-                    "created_at": safe_get(user, "created_at", ""),
-                    "last_sign_in_at": safe_get(user, "last_sign_in_at", ""),
-                }
-            )
-
-            if sleep_s > 0:
-                time.sleep(sleep_s)
-
-            if count % 200 == 0:
-                eprint(f"  ...{count} users processed")
-
-    eprint(f"Users export complete: {out_csv}")
-
-
-def main():
-    parser = argparse.ArgumentParser(description="Export GitLab projects, groups, and users to CSV.")
-    parser.add_argument("--url", default=os.getenv("GITLAB_URL", ""), help="GitLab base URL, e.g. https://gitlab.example.com")
-    parser.add_argument("--token", default=os.getenv("GITLAB_TOKEN", ""), help="GitLab personal access token (PAT)")
-    parser.add_argument("--outdir", default="", help="Output directory (default: gitlab_export_<timestamp>/)")
-    parser.add_argument("--include-archived", action="store_true", help="Also export archived projects to archived_projects.csv")
-    parser.add_argument(
-        "--members-scope",
-        choices=["all", "direct"],
-        default="all",
-        help='Member listing scope: "all" includes inherited (recommended), "direct" is direct members only.',
-    )
-    parser.add_argument("--no-ssl-verify", action="store_true", help="Disable SSL verification (not recommended)")
-    parser.add_argument("--sleep", type=float, default=0.0, help="Sleep N seconds between API calls (helps with rate limits)")
-
-    args = parser.parse_args()
-
-    if not args.url:
-        eprint("ERROR: GitLab URL not provided. Use --url or set GITLAB_URL.")
-        sys.exit(2)
-    if not args.token:
-        eprint("ERROR: GitLab token not provided. Use --token or set GITLAB_TOKEN.")
-        sys.exit(2)
-
-    outdir = Path(args.outdir) if args.outdir else Path(f"gitlab_export_{utc_stamp()}")
-    outdir.mkdir(parents=True, exist_ok=True)
-
-    ssl_verify = not args.no_ssl_verify
-
-    eprint(f"Connecting to {args.url} (ssl_verify={ssl_verify}) ...")
-    gl = make_gitlab_client(args.url, args.token, ssl_verify=ssl_verify)
-
-    # Active projects always
-    export_projects(
-        gl=gl,
-        out_csv=outdir / "projects.csv",
-        archived=False,
-        members_scope=args.members_scope,
-        sleep_s=args.sleep,
-    )
-
-    # Archived projects in separate CSV if requested
-    if args.include_archived:
-        export_projects(
-            gl=gl,
-            out_csv=outdir / "archived_projects.csv",
-            archived=True,
-            members_scope=args.members_scope,
-            sleep_s=args.sleep,
-        )
-
-    # Groups
-    export_groups(
-        gl=gl,
-        out_csv=outdir / "groups.csv",
-        members_scope=args.members_scope,
-        sleep_s=args.sleep,
-    )
-
-    # Users
-    export_users(
-        gl=gl,
-        out_csv=outdir / "users.csv",
-        sleep_s=args.sleep,
-    )
-
-    print(str(outdir.resolve()))
-
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python3
+"""
+Export GitLab projects, archived projects (separately), groups, and users to CSV.
+
+Outputs (by default) in ./gitlab_export_<timestamp>/ :
+- projects.csv            : active projects, members (username:role)
+- archived_projects.csv   : archived projects, members (username:role)  [only if --include-archived]
+- groups.csv              : groups, members (username:role)
+- users.csv               : users with status and flags (admin/external/bot/etc)
+With --gzip each file is written gzip-compressed as <name>.csv.gz.
+
+Auth notes (self-managed):
+- Exporting ALL users typically requires an admin token (or equivalent permission).
+- Group/project member listings depend on token visibility.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import ssl
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+import gitlab
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:  # optional: concurrent member fetching
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON parsing of API responses
+    orjson = None
+
+
+# CSV output: rows are handed to the csv writer in batches, on top of a large
+# file buffer, so the file sees few large writes instead of one per row.
+CSV_BATCH_ROWS = 500
+CSV_BUFFER_BYTES = 1 << 20
+
+# Transient HTTP failures (rate limiting, gateway errors, dropped connections)
+# are retried with exponential backoff instead of aborting the export.
+RETRY_TOTAL = 8
+RETRY_BACKOFF_S = 1.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# python-gitlab already retries 429 itself (obey_rate_limit), so the requests
+# session must not retry it too: the two loops would multiply.
+SESSION_RETRY_STATUSES = tuple(status for status in RETRY_STATUSES if status != 429)
+
+# Requests are paced by the server's RateLimit-* headers: full speed until
+# less than this fraction of the quota remains, then wait for the reset.
+RATE_LIMIT_THRESHOLD = 0.1
+
+ACCESS_LEVELS = {
+    10: "Guest",
+    20: "Reporter",
+    30: "Developer",
+    40: "Maintainer",
+    50: "Owner",
+}
+
+# CSV columns, shared by the REST and GraphQL exporters
+PROJECT_COLUMNS = [
+    "project_id",
+    "project_name",
+    "project_path_with_namespace",
+    "http_url_to_repo",
+    "default_branch",
+    "visibility",
+    "archived",
+    "members",  # semicolon separated: username:Role
+]
+
+GROUP_COLUMNS = [
+    "group_id",
+    "group_name",
+    "group_full_path",
+    "web_url",
+    "visibility",
+    "parent_id",
+    "members",  # semicolon separated: username:Role
+]
+
+# ":Role" suffix per known access level, built once for format_members()
+_ROLE_SUFFIXES = {level: f":{name}" for level, name in ACCESS_LEVELS.items()}
+
+
+def utc_stamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_UTC")
+
+
+def eprint(*args, **kwargs):
+    print(*args, file=sys.stderr, **kwargs)
+
+
+def access_level_name(level: Optional[int]) -> str:
+    if level is None:
+        return ""
+    return ACCESS_LEVELS.get(level, str(level))
+
+
+def safe_get(obj, attr: str, default=None):
+    return getattr(obj, attr, default)
+
+
+class FastCsvWriter:
+    """
+    csv.writer-compatible writer for rows of plain values (None -> "").
+    Rows with no delimiter, quote or newline in any field - the usual case,
+    member lists being "user:Role;..." - are joined and written directly,
+    skipping the csv module's per-field quoting scan; any other row goes
+    through csv.writer, so the output is identical either way.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.writer = csv.writer(f)
+
+    def writerow(self, row: list) -> None:
+        fields = ["" if v is None else str(v) for v in row]
+        line = ",".join(fields)
+        if line.count(",") == len(fields) - 1 and '"' not in line and "\n" not in line and "\r" not in line:
+            self.f.write(line + "\r\n")
+        else:
+            self.writer.writerow(fields)
+
+    def writerows(self, rows) -> None:
+        for row in rows:
+            self.writerow(row)
+
+
+class RowBatcher:
+    """
+    Collect rows and pass them to a csv writer in batches of batch_size.
+    Call flush() once after the last row.
+    """
+
+    def __init__(self, writer, batch_size: int = CSV_BATCH_ROWS):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.rows: List[list] = []
+
+    def writerow(self, row: list) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows:
+            self.writer.writerows(self.rows)
+            self.rows.clear()
+
+
+class BackgroundRowWriter:
+    """
+    Write rows on a background thread fed by a bounded queue, so fetching the
+    next page never waits on CSV formatting or file I/O.
+    writerow() only enqueues, raising at once if the writer thread has failed;
+    close() (or leaving the `with` block) drains the queue, flushes and re-raises
+    any error from the writer thread.
+    """
+
+    _STOP = object()
+
+    def __init__(self, writer, maxsize: int = 1000):
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._loop, args=(RowBatcher(writer),), daemon=True)
+        self.thread.start()
+
+    def _loop(self, batch: RowBatcher) -> None:
+        while True:
+            row = self.queue.get()
+            if row is self._STOP:
+                break
+            if self.error is not None:
+                continue  # keep draining so producers never block
+            try:
+                batch.writerow(row)
+            except BaseException as e:
+                self.error = e
+        if self.error is None:
+            try:
+                batch.flush()
+            except BaseException as e:
+                self.error = e
+
+    def writerow(self, row: list) -> None:
+        if self.error is not None:
+            raise self.error
+        self.queue.put(row)
+
+    def close(self) -> None:
+        self.queue.put(self._STOP)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self) -> "BackgroundRowWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Always stop and join the thread before the caller closes the file.
+        if exc_type is None:
+            self.close()
+            return
+        try:
+            self.close()
+        except BaseException as e:
+            # Don't mask the producer's error, but don't lose the writer's either
+            if e is not exc:
+                eprint(f"CSV writer error: {e!r}")
+
+
+def open_csv(path: Path):
+    """
+    Open a CSV output file for writing.
+    A ".gz" suffix writes gzip-compressed CSV (text mode, utf-8).
+    """
+    if path.suffix == ".gz":
+        return gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=6)
+    return path.open("w", newline="", encoding="utf-8", buffering=CSV_BUFFER_BYTES)
+
+
+# Large listing pages are parsed with orjson when it is installed
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _orjson_response_hook(resp, *args, **kwargs):
+    """
+    requests response hook: make resp.json() (used by python-gitlab) parse
+    with orjson instead of the stdlib json module.
+    """
+    resp.json = lambda **kw: orjson.loads(resp.content)
+    return resp
+
+
+def rate_limit_delay(headers, threshold: float = RATE_LIMIT_THRESHOLD) -> float:
+    """
+    Seconds to wait before the next request, from GitLab's RateLimit-* headers:
+    0 while more than `threshold` of the quota is left, otherwise the time
+    until RateLimit-Reset (a Unix timestamp).
+    """
+    try:
+        remaining = int(headers["RateLimit-Remaining"])
+        limit = int(headers["RateLimit-Limit"])
+        reset = float(headers["RateLimit-Reset"])
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+    if limit <= 0 or remaining / limit >= threshold:
+        return 0.0
+    return max(0.0, reset - time.time())
+
+
+class RateLimiter:
+    """
+    requests response hook that paces all python-gitlab calls by the server's
+    RateLimit-* headers, so the full quota is used without exceeding it.
+    """
+
+    def __init__(self, threshold: float = RATE_LIMIT_THRESHOLD):
+        self.threshold = threshold
+        self.lock = threading.Lock()
+
+    def observe(self, resp, *args, **kwargs):
+        delay = rate_limit_delay(resp.headers, self.threshold)
+        if delay <= 0:
+            return
+        resume_at = time.time() + delay
+        # Threads hitting the limit together all wait for the same reset: the
+        # remaining time is re-read after the lock, so waits do not add up.
+        with self.lock:
+            delay = resume_at - time.time()
+            if delay > 0:
+                eprint(f"  rate limit nearly reached, pausing {delay:.0f}s ...")
+                time.sleep(delay)
+
+
+def make_session() -> requests.Session:
+    """
+    One keep-alive session shared by every python-gitlab call, so connections
+    (and TLS handshakes) are reused; transient failures are retried.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=64,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF_S,
+            status_forcelist=SESSION_RETRY_STATUSES,
+            respect_retry_after_header=True,
+            allowed_methods=["GET"],
+            # hand the final error response to python-gitlab, which raises its typed errors
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    session.hooks["response"].append(RateLimiter().observe)
+    if orjson is not None:
+        session.hooks["response"].append(_orjson_response_hook)
+    return session
+
+
+def make_gitlab_client(url: str, token: str, ssl_verify: bool) -> gitlab.Gitlab:
+    gl = gitlab.Gitlab(url=url, private_token=token, ssl_verify=ssl_verify, session=make_session())
+    gl.auth()  # validate token
+
+    # graphql_query() retries its POSTs itself; a non-retrying adapter on that
+    # path keeps the session's connect retries from multiplying with its own.
+    gl.session.mount(f"{gl.url}/api/graphql", HTTPAdapter(pool_maxsize=64))
+
+    # requests already asks for gzip/deflate and decompresses transparently.
+    # Report once whether the server compresses list responses: hooked after
+    # auth() because the tiny GET /user is often sent uncompressed regardless.
+    logged = threading.Event()
+
+    def log_encoding_once(resp, *args, **kwargs):
+        if not logged.is_set():
+            logged.set()
+            eprint(f"API response Content-Encoding: {resp.headers.get('Content-Encoding', 'none')}")
+
+    gl.session.hooks["response"].append(log_encoding_once)
+    return gl
+
+
+def iter_all(items_list_callable, keyset_order_by: Optional[str] = None, **kwargs):
+    """
+    Iterate all pages via python-gitlab using iterator=True.
+    Uses the API maximum page size (100) to minimise round-trips.
+    keyset_order_by: if set, request keyset pagination ordered by that column
+      (constant cost per page, no 10k-record cutoff). Endpoints or servers that
+      reject keyset pagination fall back to offset pagination.
+    """
+    if keyset_order_by:
+        try:
+            return items_list_callable(
+                iterator=True,
+                per_page=100,
+                pagination="keyset",
+                order_by=keyset_order_by,
+                sort="asc",
+                **kwargs,
+            )
+        except gitlab.exceptions.GitlabListError as e:
+            eprint(f"  keyset pagination unavailable ({e.response_code}), using offset pagination")
+    return items_list_callable(iterator=True, per_page=100, **kwargs)
+
+
+def retry_after_seconds(value: Optional[str]) -> float:
+    """
+    Seconds to wait from a Retry-After header, which is either a number of
+    seconds or an HTTP-date; 0.0 if absent or unparsable (use the backoff).
+    """
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+async def _respect_rate_limit(headers) -> None:
+    """
+    Pause when the RateLimit-* headers say the quota is nearly exhausted.
+    """
+    delay = rate_limit_delay(headers)
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+async def fetch_members(session, sem, api_url: str, kind: str, item_id: int, members_scope: str) -> list:
+    """
+    Fetch all members of one project or group (kind: "projects" / "groups"),
+    following Link rel="next" pagination.
+    Members are returned as attribute objects so format_members() accepts them.
+    Retryable statuses and connection errors (other than DNS failures) are
+    retried with exponential backoff (honouring Retry-After).
+    """
+    path = "members/all" if members_scope == "all" else "members"
+    url: Optional[str] = f"{api_url}/{kind}/{item_id}/{path}"
+    params: Optional[dict] = {"per_page": "100"}
+    members: list = []
+    attempt = 0
+
+    while url:
+        retry_after = 0.0
+        page = None
+        try:
+            # The semaphore slot and the connection are only held for the request
+            # itself, not for the backoff or rate-limit waits below.
+            async with sem, session.get(url, params=params) as resp:
+                if resp.status not in RETRY_STATUSES or attempt >= RETRY_TOTAL:
+                    resp.raise_for_status()
+                    page = await resp.json(loads=json_loads)
+                    headers = resp.headers
+                    next_link = resp.links.get("next")
+                else:
+                    retry_after = retry_after_seconds(resp.headers.get("Retry-After"))
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            # an unresolvable host will not start resolving during the backoff
+            dns_error = isinstance(e, aiohttp.ClientConnectorError) and isinstance(e.os_error, socket.gaierror)
+            if dns_error or attempt >= RETRY_TOTAL:
+                raise
+
+        if page is not None:
+            members.extend(SimpleNamespace(**m) for m in page)
+            url = str(next_link["url"]) if next_link else None
+            params = None  # the next link already carries the query
+            attempt = 0
+            await _respect_rate_limit(headers)
+            continue
+
+        attempt += 1
+        await asyncio.sleep(retry_after or min(RETRY_BACKOFF_S * 2 ** (attempt - 1), 120.0))
+
+    return members
+
+
+def _aiohttp_ssl(ssl_verify: bool):
+    """
+    TLS setting for aiohttp that trusts the same CAs as the requests session:
+    REQUESTS_CA_BUNDLE / CURL_CA_BUNDLE if set, else certifi's bundle.
+    """
+    if not ssl_verify:
+        return False
+    ca = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE") or requests.certs.where()
+    if os.path.isdir(ca):
+        return ssl.create_default_context(capath=ca)
+    return ssl.create_default_context(cafile=ca)
+
+
+async def fetch_all_members(
+    api_url: str,
+    token: str,
+    ssl_verify: bool,
+    kind: str,
+    scopes: Dict[int, str],
+    concurrency: int,
+    handle: Callable[[int, list], None],
+    progress_every: int = 100,
+):
+    """
+    Fetch members of every item in scopes ({item_id: members_scope}) concurrently
+    and call handle(item_id, members) as each one completes.
+    handle runs on the event loop one call at a time, so it can be the only
+    writer of a CSV file or cache.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, ssl=_aiohttp_ssl(ssl_verify))
+    headers = {"PRIVATE-TOKEN": token}
+
+    # trust_env: honour HTTP(S)_PROXY / NO_PROXY like the requests session does
+    async with aiohttp.ClientSession(connector=connector, headers=headers, trust_env=True) as session:
+
+        async def one(item_id: int, members_scope: str):
+            return item_id, await fetch_members(session, sem, api_url, kind, item_id, members_scope)
+
+        count = 0
+        for fut in asyncio.as_completed([one(item_id, scope) for item_id, scope in scopes.items()]):
+            item_id, members = await fut
+            handle(item_id, members)
+
+            count += 1
+            if progress_every and count % progress_every == 0:
+                eprint(f"  ...{count} {kind} processed")
+
+
+def _fetch_members_shard(
+    api_url: str,
+    token: str,
+    ssl_verify: bool,
+    kind: str,
+    scopes: Dict[int, str],
+    concurrency: int,
+) -> List[Tuple[int, list]]:
+    """
+    Worker process entry point: fetch one shard of member lists on its own
+    event loop and HTTP session, and return them to the parent.
+    Errors are re-raised as RuntimeError: aiohttp's exceptions carry headers
+    and connection keys that cannot be pickled back to the parent.
+    """
+    results: List[Tuple[int, list]] = []
+
+    def collect(item_id: int, members: list):
+        results.append((item_id, members))
+
+    try:
+        asyncio.run(fetch_all_members(api_url, token, ssl_verify, kind, scopes, concurrency, collect, progress_every=0))
+    except aiohttp.ClientResponseError as e:
+        raise RuntimeError(f"{kind} members: {e.status} {e.message}: {e.request_info.real_url}") from None
+    except Exception as e:
+        raise RuntimeError(f"{kind} members: {type(e).__name__}: {e}") from None
+    return results
+
+
+def _in_order(order: List[int], emit: Callable[[int, list], None]) -> Callable[[int, list], None]:
+    """
+    Wrap emit so results arriving in any order are passed on in `order`:
+    each result is held until all items before it have been emitted.
+    """
+    held: Dict[int, list] = {}
+    position = 0
+
+    def handle(item_id: int, members: list):
+        nonlocal position
+        held[item_id] = members
+        while position < len(order) and order[position] in held:
+            emit(order[position], held.pop(order[position]))
+            position += 1
+
+    return handle
+
+
+def fetch_members_parallel(
+    gl: gitlab.Gitlab,
+    kind: str,
+    scopes: Dict[int, str],
+    concurrency: int,
+    processes: int,
+    handle: Callable[[int, list], None],
+    progress_every: int = 100,
+):
+    """
+    Fetch members of every item in scopes and call handle(item_id, members) in
+    this process, which stays the only writer. handle is called in the order
+    of scopes (the listing order), however the fetches complete, so the CSV
+    rows come out the same on every run.
+    processes > 1 shards the items into consecutive chunks across worker
+    processes, each with its own event loop, so JSON parsing and request
+    overhead are not bound to one core; concurrency is split between them.
+    """
+    handle = _in_order(list(scopes), handle)
+    api = (gl.api_url, gl.private_token, bool(gl.ssl_verify))
+    if processes <= 1 or len(scopes) <= 1:
+        asyncio.run(fetch_all_members(*api, kind, scopes, concurrency, handle, progress_every))
+        return
+
+    # More shards than workers, so results reach the writer progressively
+    item_ids = list(scopes)
+    n_shards = min(len(item_ids), processes * 4)
+    size = -(-len(item_ids) // n_shards)
+    shards = [{item_id: scopes[item_id] for item_id in item_ids[n : n + size]} for n in range(0, len(item_ids), size)]
+    per_process = max(1, concurrency // processes)
+
+    count = 0
+    # spawn, not fork: exports run in threads and forking a threaded process can deadlock
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_fetch_members_shard, *api, kind, shard, per_process) for shard in shards]
+        try:
+            for fut in as_completed(futures):
+                for item_id, members in fut.result():
+                    handle(item_id, members)
+
+                    count += 1
+                    if count % progress_every == 0:
+                        eprint(f"  ...{count} {kind} processed")
+        except BaseException:
+            # don't let the pool's exit fetch every queued shard before the error surfaces
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def merge_members(*member_lists) -> list:
+    """
+    Combine member lists, keeping each user once at their highest access level
+    (the same rule GitLab applies for members/all).
+    """
+    best: dict = {}
+    for members in member_lists:
+        for m in members:
+            user_id = getattr(m, "id", None)
+            current = best.get(user_id)
+            if current is None or (getattr(m, "access_level", 0) or 0) > (getattr(current, "access_level", 0) or 0):
+                best[user_id] = m
+    return list(best.values())
+
+
+class GroupMembersCache:
+    """
+    Effective (members/all) member list of every exported group, collected
+    while groups.csv is written. A project that is not shared with any group
+    inherits exactly the members of its namespace group, so with this cache
+    such projects only need their direct members fetched.
+    """
+
+    def __init__(self):
+        self.members: Dict[int, list] = {}
+
+    def inherited_project_members(self, proj) -> Optional[List[list]]:
+        """
+        Member lists a project inherits from its namespace group.
+        None (fetch members/all instead) if the group is not cached (e.g.
+        personal namespaces) or the project is, or may be, shared with groups:
+        a share grants the invited group's own and inherited members, not the
+        members of groups shared into it, which its cached list also holds.
+        """
+        attrs = proj._attrs
+        shared_with_groups = attrs.get("shared_with_groups")
+        if shared_with_groups is None or shared_with_groups:
+            return None
+        namespace = attrs.get("namespace") or {}
+        if namespace.get("kind") != "group":
+            return None
+        group_members = self.members.get(namespace.get("id"))
+        if group_members is None:
+            return None
+        return [group_members]
+
+
+def format_members(members_iter) -> str:
+    """
+    Return semicolon-separated unique member strings: ident:Role
+    """
+    # Hot loop: attribute lookups are inlined and known roles come from the
+    # precomputed suffixes; access_level_name() only handles the rest.
+    seen = set()
+    for m in members_iter:
+        ident = getattr(m, "username", "") or getattr(m, "name", "") or f"user_id_{getattr(m, 'id', '')}"
+        level = getattr(m, "access_level", None)
+        suffix = _ROLE_SUFFIXES.get(level)
+        if suffix is None:
+            suffix = ":" + access_level_name(level)
+        seen.add(ident + suffix)
+
+    return ";".join(sorted(seen))
+
+
+def export_projects(
+    gl: gitlab.Gitlab,
+    out_csv: Path,
+    archived: bool,
+    members_scope: str,
+    concurrency: int = 0,
+    group_cache: Optional[GroupMembersCache] = None,
+    processes: int = 1,
+):
+    """
+    Export projects + members + roles.
+    archived: if True, export only archived projects; if False export only non-archived.
+    members_scope:
+      - "all"    : includes inherited members (group/ancestor)
+      - "direct" : direct project members only
+    concurrency: if > 0, fetch members with that many parallel requests (requires aiohttp).
+    group_cache: filled by export_groups(); with members_scope "all", only direct project
+      members are fetched and inherited ones come from the cache (projects it cannot
+      resolve still use members/all).
+    processes: worker processes sharing the concurrent member fetches.
+    """
+    label = "archived projects" if archived else "active projects"
+    eprint(f"Exporting {label} -> {out_csv.name} ...")
+
+    with open_csv(out_csv) as f:
+        writer = FastCsvWriter(f)
+        writer.writerow(PROJECT_COLUMNS)
+        with BackgroundRowWriter(writer) as out:
+            projects = iter_all(gl.projects.list, keyset_order_by="id", archived=archived)
+
+            # Rows waiting for their members when they are fetched concurrently
+            pending: Dict[int, list] = {}
+            scopes: Dict[int, str] = {}
+            inherited_by_id: Dict[int, List[list]] = {}
+
+            count = 0
+            for p in projects:
+                # List results already carry every exported field (and the member
+                # managers), so only re-fetch when the server trimmed the object.
+                proj = p if hasattr(p, "path_with_namespace") else gl.projects.get(p.id)
+
+                # RESTObject keeps the API fields in _attrs; reading the dict
+                # directly skips __getattr__ for every field of every row.
+                attrs = proj._attrs
+                row = [
+                    attrs.get("id"),
+                    attrs.get("name", ""),
+                    attrs.get("path_with_namespace", ""),
+                    attrs.get("http_url_to_repo", ""),
+                    attrs.get("default_branch", ""),
+                    attrs.get("visibility", ""),
+                    bool(attrs.get("archived", False)),
+                ]
+
+                inherited = None
+                if members_scope == "all" and group_cache is not None:
+                    inherited = group_cache.inherited_project_members(proj)
+                scope = "direct" if inherited is not None else members_scope
+
+                if concurrency > 0:
+                    pending[proj.id] = row
+                    scopes[proj.id] = scope
+                    if inherited is not None:
+                        inherited_by_id[proj.id] = inherited
+                    continue
+
+                count += 1
+                if scope == "all":
+                    members = iter_all(proj.members_all.list)
+                else:
+                    members = iter_all(proj.members.list)
+                if inherited is not None:
+                    members = merge_members(members, *inherited)
+
+                row.append(format_members(members))
+                out.writerow(row)
+
+                if count % 50 == 0:
+                    eprint(f"  ...{count} projects processed")
+
+            def write_row(project_id: int, members: list):
+                if project_id in inherited_by_id:
+                    members = merge_members(members, *inherited_by_id[project_id])
+                row = pending[project_id]
+                row.append(format_members(members))
+                out.writerow(row)
+
+            if pending:
+                eprint(f"  fetching members of {len(pending)} projects ({concurrency} concurrent requests) ...")
+                fetch_members_parallel(gl, "projects", scopes, concurrency, processes, write_row, progress_every=50)
+
+    eprint(f"Projects export complete: {out_csv}")
+
+
+def export_groups(
+    gl: gitlab.Gitlab,
+    out_csv: Path,
+    members_scope: str,
+    concurrency: int = 0,
+    processes: int = 1,
+    group_cache: Optional[GroupMembersCache] = None,
+):
+    """
+    Export groups + members + roles.
+    members_scope:
+      - "all"    : includes inherited members (from parent groups)
+      - "direct" : direct group members only
+    concurrency: if > 0, fetch members with that many parallel requests (requires aiohttp).
+    processes: worker processes sharing the concurrent member fetches.
+    group_cache: if given (members_scope "all"), every group's member list is
+      stored in it for export_projects().
+    """
+    eprint(f"Exporting groups -> {out_csv.name} ...")
+
+    with open_csv(out_csv) as f:
+        writer = FastCsvWriter(f)
+        writer.writerow(GROUP_COLUMNS)
+        with BackgroundRowWriter(writer) as out:
+            # GitLab only serves keyset pagination on /groups to unauthenticated requests
+            groups = iter_all(gl.groups.list)
+
+            pending: Dict[int, list] = {}
+
+            count = 0
+            for g in groups:
+                grp = g if hasattr(g, "full_path") else gl.groups.get(g.id)
+
+                attrs = grp._attrs
+                row = [
+                    attrs.get("id"),
+                    attrs.get("name", ""),
+                    attrs.get("full_path", ""),
+                    attrs.get("web_url", ""),
+                    attrs.get("visibility", ""),
+                    attrs.get("parent_id", ""),
+                ]
+
+                if concurrency > 0:
+                    pending[grp.id] = row
+                    continue
+
+                count += 1
+                if members_scope == "all":
+                    members = iter_all(grp.members_all.list)
+                else:
+                    members = iter_all(grp.members.list)
+                if group_cache is not None:
+                    members = group_cache.members[grp.id] = list(members)
+
+                row.append(format_members(members))
+                out.writerow(row)
+
+                if count % 100 == 0:
+                    eprint(f"  ...{count} groups processed")
+
+            def write_row(group_id: int, members: list):
+                if group_cache is not None:
+                    group_cache.members[group_id] = members
+                row = pending[group_id]
+                row.append(format_members(members))
+                out.writerow(row)
+
+            if pending:
+                eprint(f"  fetching members of {len(pending)} groups ({concurrency} concurrent requests) ...")
+                scopes = dict.fromkeys(pending, members_scope)
+                fetch_members_parallel(gl, "groups", scopes, concurrency, processes, write_row)
+
+    eprint(f"Groups export complete: {out_csv}")
+
+
+def export_users(
+    gl: gitlab.Gitlab,
+    out_csv: Path,
+):
+    """
+    Export users + status + flags.
+    Listing all users typically requires admin rights on self-managed GitLab.
+    """
+    eprint(f"Exporting users -> {out_csv.name} ...")
+
+    with open_csv(out_csv) as f:
+        writer = FastCsvWriter(f)
+        writer.writerow(
+            [
+                "user_id",
+                "username",
+                "name",
+                "state",          # active / blocked / etc
+                "is_admin",
+                "external",
+                "bot",
+                "email",
+                "created_at",
+                "last_sign_in_at",
+            ]
+        )
+        with BackgroundRowWriter(writer) as out:
+            users = iter_all(gl.users.list, keyset_order_by="id")
+
+            # For an admin token the list already carries every field, so there is
+            # no per-user GET. Without admin rights the list only has the basic
+            # fields (no created_at, bot, ...), so those users are fetched one by
+            # one as before. Email stays hidden for everyone but the token's own
+            # user, whose full record gl.auth() already fetched.
+            me = gl.user._attrs if gl.user is not None else {}
+
+            count = 0
+            for u in users:
+                count += 1
+                attrs = u._attrs
+                if "created_at" not in attrs:
+                    attrs = gl.users.get(u.id)._attrs
+                email = attrs.get("email", "")
+                if not email and attrs.get("id") == me.get("id"):
+                    email = me.get("email", "")
+
+                out.writerow(
+                    [
+                        attrs.get("id"),
+                        attrs.get("username", ""),
+                        attrs.get("name", ""),
+                        attrs.get("state", ""),
+                        bool(attrs.get("is_admin", False)),
+                        bool(attrs.get("external", False)),
+                        bool(attrs.get("bot", False)),
+                        email,
+                        attrs.get("created_at", ""),
+                        attrs.get("last_sign_in_at", ""),
+                    ]
+                )
+
+                if count % 200 == 0:
+                    eprint(f"  ...{count} users processed")
+
+    eprint(f"Users export complete: {out_csv}")
+
+
+# GraphQL mode: one query returns a page of projects/groups together with
+# their first page of members, replacing 1 + N + sum(M) REST calls.
+GRAPHQL_PROJECT_RELATIONS = {"all": ["DIRECT", "INHERITED", "INVITED_GROUPS", "SHARED_INTO_ANCESTORS"], "direct": ["DIRECT"]}
+GRAPHQL_GROUP_RELATIONS = {"all": ["DIRECT", "INHERITED", "SHARED_FROM_GROUPS"], "direct": ["DIRECT"]}
+
+_GRAPHQL_MEMBERS = """
+      pageInfo { endCursor hasNextPage }
+      nodes { user { id username name } accessLevel { integerValue } }
+"""
+
+GRAPHQL_PROJECTS_QUERY = """
+query($after: String, $archived: ProjectArchived, $relations: [ProjectMemberRelation!]) {
+  projects(first: 100, after: $after, archived: $archived) {
+    pageInfo { endCursor hasNextPage }
+    nodes {
+      id name fullPath httpUrlToRepo visibility archived
+      repository { rootRef }
+      members: projectMembers(first: 100, relations: $relations) {%s}
+    }
+  }
+}
+""" % _GRAPHQL_MEMBERS
+
+GRAPHQL_PROJECT_MEMBERS_QUERY = """
+query($fullPath: ID!, $after: String, $relations: [ProjectMemberRelation!]) {
+  node: project(fullPath: $fullPath) {
+    members: projectMembers(first: 100, after: $after, relations: $relations) {%s}
+  }
+}
+""" % _GRAPHQL_MEMBERS
+
+GRAPHQL_GROUPS_QUERY = """
+query($after: String, $relations: [GroupMemberRelation!]) {
+  groups(first: 100, after: $after) {
+    pageInfo { endCursor hasNextPage }
+    nodes {
+      id name fullPath webUrl visibility
+      parent { id }
+      members: groupMembers(first: 100, relations: $relations) {%s}
+    }
+  }
+}
+""" % _GRAPHQL_MEMBERS
+
+GRAPHQL_GROUP_MEMBERS_QUERY = """
+query($fullPath: ID!, $after: String, $relations: [GroupMemberRelation!]) {
+  node: group(fullPath: $fullPath) {
+    members: groupMembers(first: 100, after: $after, relations: $relations) {%s}
+  }
+}
+""" % _GRAPHQL_MEMBERS
+
+
+def graphql_query(gl: gitlab.Gitlab, query: str, variables: dict) -> dict:
+    """
+    POST one query to /api/graphql over the client's session and return its data.
+    The GraphQL path is mounted without adapter retries (make_gitlab_client),
+    so retryable statuses and connection errors are retried only here, with
+    the same backoff (honouring Retry-After).
+    """
+    attempt = 0
+    while True:
+        retry_after = 0.0
+        try:
+            resp = gl.session.post(
+                f"{gl.url}/api/graphql",
+                json={"query": query, "variables": variables},
+                headers={"Authorization": f"Bearer {gl.private_token}"},
+                verify=gl.ssl_verify,
+                timeout=gl.timeout,
+            )
+            if resp.status_code not in RETRY_STATUSES:
+                break
+            if attempt >= RETRY_TOTAL:
+                resp.raise_for_status()
+            retry_after = retry_after_seconds(resp.headers.get("Retry-After"))
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= RETRY_TOTAL:
+                raise
+
+        attempt += 1
+        time.sleep(retry_after or min(RETRY_BACKOFF_S * 2 ** (attempt - 1), 120.0))
+
+    resp.raise_for_status()
+    body = resp.json()
+    if body.get("errors"):
+        raise gitlab.exceptions.GitlabError(f"GraphQL error: {body['errors'][0].get('message')}")
+    return body["data"]
+
+
+def _graphql_nodes(gl: gitlab.Gitlab, query: str, variables: dict, key: str):
+    """
+    Iterate the nodes of a top-level connection, following endCursor.
+    """
+    after = None
+    while True:
+        conn = graphql_query(gl, query, {**variables, "after": after})[key]
+        yield from conn["nodes"]
+        if not conn["pageInfo"]["hasNextPage"]:
+            return
+        after = conn["pageInfo"]["endCursor"]
+
+
+def _graphql_members(gl: gitlab.Gitlab, node: dict, members_query: str, relations: List[str]) -> list:
+    """
+    All members of a project/group node: the page embedded in the node, plus
+    any further pages. Returned in the shape format_members() expects, with
+    duplicate users (e.g. direct + inherited) kept at their highest access level.
+    """
+    conn = node["members"]
+    nodes = list(conn["nodes"])
+    while conn["pageInfo"]["hasNextPage"]:
+        variables = {"fullPath": node["fullPath"], "after": conn["pageInfo"]["endCursor"], "relations": relations}
+        conn = graphql_query(gl, members_query, variables)["node"]["members"]
+        nodes.extend(conn["nodes"])
+
+    return merge_members(
+        [
+            SimpleNamespace(
+                id=n["user"].get("id"),
+                username=n["user"].get("username") or "",
+                name=n["user"].get("name") or "",
+                access_level=(n.get("accessLevel") or {}).get("integerValue"),
+            )
+            for n in nodes
+            if n.get("user")
+        ]
+    )
+
+
+def _gid(global_id: Optional[str]):
+    """
+    Numeric id from a GraphQL global id ("gid://gitlab/Project/42" -> 42).
+    """
+    return int(global_id.rsplit("/", 1)[-1]) if global_id else ""
+
+
+def export_projects_graphql(
+    gl: gitlab.Gitlab,
+    out_csv: Path,
+    archived: bool,
+    members_scope: str,
+):
+    """
+    Same output as export_projects(), fetched through GraphQL.
+    """
+    label = "archived projects" if archived else "active projects"
+    eprint(f"Exporting {label} via GraphQL -> {out_csv.name} ...")
+
+    relations = GRAPHQL_PROJECT_RELATIONS[members_scope]
+    variables = {"archived": "ONLY" if archived else "EXCLUDE", "relations": relations}
+
+    with open_csv(out_csv) as f:
+        writer = FastCsvWriter(f)
+        writer.writerow(PROJECT_COLUMNS)
+        with BackgroundRowWriter(writer) as out:
+            count = 0
+            for node in _graphql_nodes(gl, GRAPHQL_PROJECTS_QUERY, variables, "projects"):
+                count += 1
+                members = _graphql_members(gl, node, GRAPHQL_PROJECT_MEMBERS_QUERY, relations)
+
+                out.writerow(
+                    [
+                        _gid(node.get("id")),
+                        node.get("name") or "",
+                        node.get("fullPath") or "",
+                        node.get("httpUrlToRepo") or "",
+                        (node.get("repository") or {}).get("rootRef") or "",
+                        node.get("visibility") or "",
+                        bool(node.get("archived")),
+                        format_members(members),
+                    ]
+                )
+
+                if count % 50 == 0:
+                    eprint(f"  ...{count} projects processed")
+
+    eprint(f"Projects export complete: {out_csv}")
+
+
+def export_groups_graphql(
+    gl: gitlab.Gitlab,
+    out_csv: Path,
+    members_scope: str,
+):
+    """
+    Same output as export_groups(), fetched through GraphQL.
+    """
+    eprint(f"Exporting groups via GraphQL -> {out_csv.name} ...")
+
+    relations = GRAPHQL_GROUP_RELATIONS[members_scope]
+
+    with open_csv(out_csv) as f:
+        writer = FastCsvWriter(f)
+        writer.writerow(GROUP_COLUMNS)
+        with BackgroundRowWriter(writer) as out:
+            count = 0
+            for node in _graphql_nodes(gl, GRAPHQL_GROUPS_QUERY, {"relations": relations}, "groups"):
+                count += 1
+                members = _graphql_members(gl, node, GRAPHQL_GROUP_MEMBERS_QUERY, relations)
+
+                out.writerow(
+                    [
+                        _gid(node.get("id")),
+                        node.get("name") or "",
+                        node.get("fullPath") or "",
+                        node.get("webUrl") or "",
+                        node.get("visibility") or "",
+                        _gid((node.get("parent") or {}).get("id")),
+                        format_members(members),
+                    ]
+                )
+
+                if count % 100 == 0:
+                    eprint(f"  ...{count} groups processed")
+
+    eprint(f"Groups export complete: {out_csv}")
+
+
+def run_parallel(*jobs: Callable[[], None]) -> None:
+    """
+    Run independent export jobs concurrently in a thread pool, all sharing the
+    client's connection pool, so the total time is roughly that of the slowest
+    job instead of the sum. The first error (or Ctrl-C) cancels jobs that have
+    not started and is re-raised without waiting for the ones still running;
+    any other job that has failed by then is logged.
+    """
+    if len(jobs) == 1:
+        jobs[0]()
+        return
+    if not jobs:
+        return
+
+    pool = ThreadPoolExecutor(max_workers=len(jobs))
+    futures = [pool.submit(job) for job in jobs]
+    try:
+        wait(futures, return_when=FIRST_EXCEPTION)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    errors = [fut.exception() for fut in futures if fut.done() and not fut.cancelled() and fut.exception()]
+    for exc in errors[1:]:
+        eprint(f"Another export also failed: {exc!r}")
+    if errors:
+        raise errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export GitLab projects, groups, and users to CSV.")
+    parser.add_argument("--url", default=os.getenv("GITLAB_URL", ""), help="GitLab base URL, e.g. https://gitlab.example.com")
+    parser.add_argument("--token", default=os.getenv("GITLAB_TOKEN", ""), help="GitLab personal access token (PAT)")
+    parser.add_argument("--outdir", default="", help="Output directory (default: gitlab_export_<timestamp>/)")
+    parser.add_argument("--include-archived", action="store_true", help="Also export archived projects to archived_projects.csv")
+    parser.add_argument(
+        "--members-scope",
+        choices=["all", "direct"],
+        default="all",
+        help='Member listing scope: "all" includes inherited (recommended), "direct" is direct members only.',
+    )
+    parser.add_argument(
+        "--graphql",
+        action="store_true",
+        help="Fetch projects, groups and their members through the GraphQL API (far fewer requests)",
+    )
+    parser.add_argument("--gzip", action="store_true", help="Write gzip-compressed CSV files (*.csv.gz)")
+    parser.add_argument("--no-ssl-verify", action="store_true", help="Disable SSL verification (not recommended)")
+    # Superseded by RateLimit-* header pacing; still accepted so existing invocations keep working
+    parser.add_argument("--sleep", type=float, default=0.0, help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=64,
+        help="Parallel member requests (requires aiohttp; 0 = fetch members serially)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Worker processes sharing the parallel member requests (0 = one per CPU core)",
+    )
+
+    args = parser.parse_args()
+
+    if not args.url:
+        eprint("ERROR: GitLab URL not provided. Use --url or set GITLAB_URL.")
+        sys.exit(2)
+    if not args.token:
+        eprint("ERROR: GitLab token not provided. Use --token or set GITLAB_TOKEN.")
+        sys.exit(2)
+
+    outdir = Path(args.outdir) if args.outdir else Path(f"gitlab_export_{utc_stamp()}")
+    outdir.mkdir(parents=True, exist_ok=True)
+    ext = ".csv.gz" if args.gzip else ".csv"
+
+    ssl_verify = not args.no_ssl_verify
+    if args.sleep:
+        eprint("--sleep is ignored: requests are paced by the server's RateLimit-* headers.")
+
+    eprint(f"Connecting to {args.url} (ssl_verify={ssl_verify}) ...")
+    gl = make_gitlab_client(args.url, args.token, ssl_verify=ssl_verify)
+
+    concurrency = args.concurrency
+    if concurrency > 0 and aiohttp is None:
+        eprint("aiohttp is not installed; fetching members serially.")
+        concurrency = 0
+    processes = args.processes if args.processes > 0 else (os.cpu_count() or 1)
+
+    # Exports that hit different endpoints run side by side (see run_parallel).
+    jobs: List[Callable[[], None]] = []
+
+    if args.graphql:
+        # One request per page of groups/projects, first page of members included
+        jobs.append(partial(export_groups_graphql, gl=gl, out_csv=outdir / f"groups{ext}", members_scope=args.members_scope))
+        jobs.append(
+            partial(
+                export_projects_graphql,
+                gl=gl,
+                out_csv=outdir / f"projects{ext}",
+                archived=False,
+                members_scope=args.members_scope,
+            )
+        )
+        if args.include_archived:
+            jobs.append(
+                partial(
+                    export_projects_graphql,
+                    gl=gl,
+                    out_csv=outdir / f"archived_projects{ext}",
+                    archived=True,
+                    members_scope=args.members_scope,
+                )
+            )
+    else:
+        # Groups first: with members_scope "all" the same sweep fills the cache
+        # that supplies every project's inherited members.
+        group_cache = GroupMembersCache() if args.members_scope == "all" else None
+
+        # Active and archived projects fetch members at the same time, so they
+        # split the parallel request budget and the worker processes.
+        project_concurrency = concurrency
+        active_processes = archived_processes = processes
+        if args.include_archived:
+            if concurrency > 0:
+                project_concurrency = max(1, concurrency // 2)
+            archived_processes = max(1, processes // 2)
+            active_processes = max(1, processes - archived_processes)
+
+        # Active projects always
+        project_jobs = [
+            partial(
+                export_projects,
+                gl=gl,
+                out_csv=outdir / f"projects{ext}",
+                archived=False,
+                members_scope=args.members_scope,
+                concurrency=project_concurrency,
+                processes=active_processes,
+                group_cache=group_cache,
+            )
+        ]
+
+        # Archived projects in separate CSV if requested
+        if args.include_archived:
+            project_jobs.append(
+                partial(
+                    export_projects,
+                    gl=gl,
+                    out_csv=outdir / f"archived_projects{ext}",
+                    archived=True,
+                    members_scope=args.members_scope,
+                    concurrency=project_concurrency,
+                    processes=archived_processes,
+                    group_cache=group_cache,
+                )
+            )
+
+        def groups_then_projects():
+            export_groups(
+                gl=gl,
+                out_csv=outdir / f"groups{ext}",
+                members_scope=args.members_scope,
+                concurrency=concurrency,
+                processes=processes,
+                group_cache=group_cache,
+            )
+            run_parallel(*project_jobs)
+
+        jobs.append(groups_then_projects)
+
+    # Users (member listings lack state/flags and miss users without memberships)
+    jobs.append(partial(export_users, gl=gl, out_csv=outdir / f"users{ext}"))
+
+    try:
+        run_parallel(*jobs)
+    except BaseException as exc:
+        # Jobs still running are blocked in network calls that cannot be
+        # interrupted, and the interpreter would wait for them on exit.
+        if isinstance(exc, KeyboardInterrupt):
+            eprint("Interrupted.")
+        else:
+            traceback.print_exc()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(130 if isinstance(exc, KeyboardInterrupt) else 1)
+
+    print(str(outdir.resolve()))
+
+
+if __name__ == "__main__":
+    main()
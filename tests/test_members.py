@@ -0,0 +1,65 @@
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+
+_spec = importlib.util.spec_from_file_location("gitlab_export", Path(__file__).resolve().parent.parent / "gitlab-export.py")
+ge = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(ge)
+
+
+def member(user_id, access_level):
+    return SimpleNamespace(id=user_id, username=f"user{user_id}", name=f"User {user_id}", access_level=access_level)
+
+
+def project(**attrs):
+    return SimpleNamespace(_attrs=attrs)
+
+
+def test_merge_members_keeps_highest_access_level():
+    merged = ge.merge_members([member(1, 30), member(2, 40)], [member(1, 50), member(3, 10)], [member(2, 20)])
+
+    assert {m.id: m.access_level for m in merged} == {1: 50, 2: 40, 3: 10}
+
+
+def test_merge_members_accepts_iterators():
+    merged = ge.merge_members(iter([member(1, 30)]), iter([member(1, 30)]))
+
+    assert [m.id for m in merged] == [1]
+
+
+def test_inherited_members_from_cached_namespace_group():
+    cache = ge.GroupMembersCache()
+    cache.members[7] = [member(1, 30)]
+
+    proj = project(namespace={"kind": "group", "id": 7}, shared_with_groups=[])
+
+    assert cache.inherited_project_members(proj) == [cache.members[7]]
+
+
+def test_inherited_members_none_for_uncached_or_user_namespace():
+    cache = ge.GroupMembersCache()
+
+    assert cache.inherited_project_members(project(namespace={"kind": "group", "id": 7}, shared_with_groups=[])) is None
+    assert cache.inherited_project_members(project(namespace={"kind": "user", "id": 3}, shared_with_groups=[])) is None
+
+
+def test_inherited_members_none_for_shared_project():
+    # The shared group's cached members/all also holds groups shared into it,
+    # which a project share does not pass on; members/all must be fetched.
+    cache = ge.GroupMembersCache()
+    cache.members[7] = [member(1, 30)]
+    cache.members[8] = [member(2, 40)]
+
+    proj = project(
+        namespace={"kind": "group", "id": 7},
+        shared_with_groups=[{"group_id": 8, "group_access_level": 30}],
+    )
+
+    assert cache.inherited_project_members(proj) is None
+
+
+def test_inherited_members_none_without_shared_with_groups_field():
+    cache = ge.GroupMembersCache()
+    cache.members[7] = [member(1, 30)]
+
+    assert cache.inherited_project_members(project(namespace={"kind": "group", "id": 7})) is None